@@ -0,0 +1,244 @@
+"""
+_cohort.py
+
+Clean-cohort loading and per-variant aggregation shared by
+experiment_analysis.py and bayesian_experiment_analysis.py.
+
+The clean cohort is:
+    - rows for the requested experiment
+    - eligible visitors (is_eligible_visitor == 1)
+    - non-contaminated users (contamination_flag == "Not Contaminated")
+    - first occurrence of each user (duplication_rank == 1)
+
+To run both analyses on the same DataFrame while aggregating only once,
+call aggregate_for_experiment yourself and pass the result to each
+analysis as agg=.
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow is optional; load with pandas instead
+    ds = None
+
+
+# ------------------------------------------------------------
+# 1. Loading
+# ------------------------------------------------------------
+
+# Columns needed by the cohort filter and the aggregations
+COHORT_COLUMNS = [
+    "experiment_name",
+    "variant",
+    "user_id",
+    "is_eligible_visitor",
+    "contamination_flag",
+    "duplication_rank",
+    "is_activated",
+    "is_converted",
+    "new_booking_flag",
+    "nb_mrr",
+    "total_revenue",
+]
+
+# Low-cardinality string columns read as categoricals, so the cohort
+# filter compares small integer codes instead of Python strings
+CATEGORICAL_COLUMNS = ["experiment_name", "variant", "contamination_flag"]
+
+# Money columns are always read as floats, even if every value in a file
+# (or in the first block Arrow infers types from) happens to be whole
+FLOAT_COLUMNS = ["nb_mrr", "total_revenue"]
+
+# Explicit Arrow column types, so the scan never infers a type from the
+# first block that a later row does not fit
+if ds is not None:
+    ARROW_COLUMN_TYPES = {
+        "experiment_name": pa.string(),
+        "variant": pa.string(),
+        "user_id": pa.string(),
+        "is_eligible_visitor": pa.int64(),
+        "contamination_flag": pa.string(),
+        "duplication_rank": pa.int64(),
+        "is_activated": pa.int64(),
+        "is_converted": pa.int64(),
+        "new_booking_flag": pa.int64(),
+        "nb_mrr": pa.float64(),
+        "total_revenue": pa.float64(),
+    }
+
+
+def _category_code(column, value):
+    """
+    Integer code of value in a categorical column, or -2 if it is absent
+    (pandas uses -1 for missing values, so -2 never matches a row).
+    """
+    categories = column.cat.categories
+    return categories.get_loc(value) if value in categories else -2
+
+
+def _equals(column, value):
+    """
+    Boolean array for column == value, comparing codes for categoricals.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy() == _category_code(column, value)
+    return (column == value).to_numpy()
+
+
+def _clean_mask(df, experiment_name):
+    """
+    Boolean array selecting the clean cohort rows of df.
+    """
+    experiment = df["experiment_name"]
+    contamination = df["contamination_flag"]
+
+    return (
+        _equals(experiment, experiment_name)
+        & (df["is_eligible_visitor"].to_numpy() == 1)
+        & _equals(contamination, "Not Contaminated")
+        & (df["duplication_rank"].to_numpy() == 1)
+    )
+
+
+def load_experiment_outcomes(csv_path, experiment_name="homepage_cta_test"):
+    """
+    Load only the clean cohort for one experiment from the outcomes CSV.
+
+    With pyarrow installed, columns are projected and the cohort filter is
+    pushed down into the Arrow scan, so only matching rows of the needed
+    columns are ever materialized in pandas. Otherwise falls back to
+    pd.read_csv with usecols and a boolean mask.
+
+    The string columns in CATEGORICAL_COLUMNS are returned as categoricals
+    and FLOAT_COLUMNS as float64, whichever path is used. Arrow reads
+    user_id as strings, so ids of any format load; it only feeds the
+    distinct-user counts.
+    """
+    if ds is None:
+        df = pd.read_csv(
+            csv_path,
+            usecols=COHORT_COLUMNS,
+            dtype={
+                **{col: "category" for col in CATEGORICAL_COLUMNS},
+                **{col: "float64" for col in FLOAT_COLUMNS},
+            },
+        )
+        return df[_clean_mask(df, experiment_name)].reset_index(drop=True)
+
+    csv_format = ds.CsvFileFormat(
+        convert_options=pyarrow.csv.ConvertOptions(column_types=ARROW_COLUMN_TYPES)
+    )
+    dataset = ds.dataset(csv_path, format=csv_format)
+    table = dataset.to_table(
+        columns=COHORT_COLUMNS,
+        filter=(
+            (ds.field("experiment_name") == experiment_name)
+            & (ds.field("is_eligible_visitor") == 1)
+            & (ds.field("contamination_flag") == "Not Contaminated")
+            & (ds.field("duplication_rank") == 1)
+        ),
+    )
+    return table.to_pandas().astype({col: "category" for col in CATEGORICAL_COLUMNS})
+
+
+# ------------------------------------------------------------
+# 2. Aggregation
+# ------------------------------------------------------------
+
+def _group_sum(codes, values, n_groups):
+    """
+    Per-group sum of values via np.bincount, skipping NaNs like pandas and
+    keeping integer columns integer.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        values = np.where(np.isnan(values), 0.0, values)
+    sums = np.bincount(codes, weights=values, minlength=n_groups)
+    if np.issubdtype(values.dtype, np.integer) or values.dtype == bool:
+        return sums.astype(np.int64)
+    return sums
+
+
+def _group_nunique(codes, values, n_groups):
+    """
+    Per-group count of distinct non-null values.
+
+    values are factorized to integer codes once and packed with the group
+    code into a single int64 key; after one sort, each run of equal keys is
+    one distinct (group, value) pair. No per-group hashing of the raw
+    (possibly string) values is needed.
+    """
+    value_codes, uniques = pd.factorize(values)
+    keep = value_codes >= 0
+
+    keys = codes[keep].astype(np.int64) * len(uniques) + value_codes[keep]
+    keys.sort()
+
+    run_start = np.ones(len(keys), dtype=bool)
+    run_start[1:] = keys[1:] != keys[:-1]
+    return np.bincount(keys[run_start] // max(len(uniques), 1), minlength=n_groups)
+
+
+def _group_mean_std(codes, values, n_groups):
+    """
+    Per-group mean and sample standard deviation (ddof=1), ignoring NaNs.
+
+    Two vectorized passes: group means first, then the centered sum of
+    squares, which avoids the cancellation of the E[x^2] - E[x]^2 form.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+
+    n = np.bincount(codes, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(codes, weights=values, minlength=n_groups) / n
+        ss = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_groups)
+        std = np.where(n > 1, np.sqrt(ss / (n - 1)), np.nan)
+
+    return mean, std
+
+
+def aggregate_for_experiment(df, experiment_name="homepage_cta_test", prefiltered=False):
+    """
+    Filter to a clean cohort and aggregate metrics by variant.
+
+    prefiltered=True skips the cohort filter, for frames that already hold
+    only the clean cohort (such as the output of load_experiment_outcomes).
+
+    Returns a DataFrame with:
+    - users, activations, conversions, new_bookings
+    - total_new_mrr, total_revenue
+    - avg_nb_mrr, sd_nb_mrr, n_nb_mrr (for t-test)
+    """
+    clean = df if prefiltered else df[_clean_mask(df, experiment_name)]
+
+    # One vectorized pass per column instead of a groupby with mixed aggfuncs.
+    # Rows with a missing variant get code -1; groupby drops them, so do we.
+    codes, variants = pd.factorize(clean["variant"], sort=True)
+    clean = clean[codes >= 0]
+    codes = codes[codes >= 0]
+    n_groups = len(variants)
+
+    avg_nb_mrr, sd_nb_mrr = _group_mean_std(codes, clean["nb_mrr"].to_numpy(), n_groups)
+
+    agg = pd.DataFrame(
+        {
+            "variant": variants,
+            "users": _group_nunique(codes, clean["user_id"].to_numpy(), n_groups),
+            "activations": _group_sum(codes, clean["is_activated"].to_numpy(), n_groups),
+            "conversions": _group_sum(codes, clean["is_converted"].to_numpy(), n_groups),
+            "new_bookings": _group_sum(codes, clean["new_booking_flag"].to_numpy(), n_groups),
+            "total_new_mrr": _group_sum(codes, clean["nb_mrr"].to_numpy(), n_groups),
+            "total_revenue": _group_sum(codes, clean["total_revenue"].to_numpy(), n_groups),
+            "avg_nb_mrr": avg_nb_mrr,
+            "sd_nb_mrr": sd_nb_mrr,
+            "n_nb_mrr": np.bincount(codes, minlength=n_groups),
+        }
+    )
+
+    return agg
@@ -14,79 +14,311 @@ rate for each variant.
 
 We then:
     - compute the posterior for control and treatment
-    - draw samples from both posteriors
     - estimate:
-        * posterior mean rate per variant
+        * posterior mean rate and 95% credible interval per variant
         * posterior mean difference (treatment - control)
         * 95% credible interval for the difference
         * P(treatment > control)
+
+By default the summaries are computed in closed form from the Beta
+posteriors (method="closed_form"); method="simulation" draws Monte Carlo
+samples from both posteriors instead.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
+from scipy.special import betainc, betaincinv, betaln
+
+from _cohort import aggregate_for_experiment, load_experiment_outcomes
 
 
 # ------------------------------------------------------------
-# 1. Aggregation (same clean cohort logic as in experiment_analysis.py)
+# 1. Beta-Binomial helpers
 # ------------------------------------------------------------
 
-def aggregate_for_experiment(df, experiment_name="homepage_cta_test"):
+def beta_posterior_params(a_prior, b_prior, successes, trials):
     """
-    Filter to a clean cohort and aggregate counts by variant.
+    Conjugate update of Beta prior with Binomial likelihood.
 
-    Returns a DataFrame with:
-    - users
-    - activations
-    - conversions
-    - new_bookings
+    a_post = a_prior + successes
+    b_post = b_prior + trials - successes
     """
-    clean = df[
-        (df["experiment_name"] == experiment_name)
-        & (df["is_eligible_visitor"] == 1)
-        & (df["contamination_flag"] == "Not Contaminated")
-        & (df["duplication_rank"] == 1)
-    ]
+    return a_prior + successes, b_prior + trials - successes
 
-    agg = (
-        clean.groupby("variant")
-        .agg(
-            users=("user_id", "nunique"),
-            activations=("is_activated", "sum"),
-            conversions=("is_converted", "sum"),
-            new_bookings=("new_booking_flag", "sum"),
-        )
-        .reset_index()
+
+# Above this many terms the series costs more than the quadrature in
+# _posterior_pair_cdfs, which is accurate to about 1e-6
+_MAX_SERIES_TERMS = 2000
+
+
+def _prob_treatment_greater_series(a_c, b_c, a_t, b_t):
+    """
+    P(Beta(a_t, b_t) > Beta(a_c, b_c)) for integer a_t, summing the a_t
+    terms of the closed-form series in log space.
+    """
+    i = np.arange(int(a_t))
+    if i.size == 0:
+        return 0.0
+    log_terms = (
+        betaln(a_c + i, b_c + b_t)
+        - np.log(b_t + i)
+        - betaln(1 + i, b_t)
+        - betaln(a_c, b_c)
     )
+    prob = float(np.exp(np.logaddexp.reduce(log_terms)))
+    return min(max(prob, 0.0), 1.0)
 
-    return agg
 
+# Gauss-Legendre rule on (0, 1) for the integrals in _posterior_pair_cdfs
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(128)
+_GL_NODES = (_GL_NODES + 1) / 2
+_GL_WEIGHTS = _GL_WEIGHTS / 2
 
-# ------------------------------------------------------------
-# 2. Beta-Binomial helpers
-# ------------------------------------------------------------
 
-def beta_posterior_params(a_prior, b_prior, successes, trials):
+def _posterior_pair_cdfs(a_c, b_c, a_t, b_t):
     """
-    Conjugate update of Beta prior with Binomial likelihood.
+    CDFs of p_t - p_c and p_t / p_c for independent Beta posteriors,
+    elementwise over arrays of parameters of one shape (the cells).
 
-    a_post = a_prior + successes
-    b_post = b_prior + trials - successes
+    Each is a one-dimensional integral over the quantiles u of the
+    narrower posterior, e.g. when that is the control,
+
+        P(p_t - p_c <= d) = integral_0^1 I_{F_c^{-1}(u) + d}(a_t, b_t) du
+        P(p_t / p_c <= r) = integral_0^1 I_{r F_c^{-1}(u)}(a_t, b_t) du
+
+    so the integrand is the smooth CDF of the wider posterior, however
+    concentrated the narrower one is. Both are evaluated with a fixed
+    Gauss-Legendre rule.
+
+    Returns (difference_cdf, ratio_cdf). Each maps an array of shape
+    (..., *cells) to the probabilities at those points.
     """
-    return a_prior + successes, b_prior + trials - successes
+    a_c, b_c, a_t, b_t = (np.asarray(x, dtype=float) for x in (a_c, b_c, a_t, b_t))
+    var_c = a_c * b_c / ((a_c + b_c) ** 2 * (a_c + b_c + 1))
+    var_t = a_t * b_t / ((a_t + b_t) ** 2 * (a_t + b_t + 1))
+    narrow_t = var_t <= var_c
 
+    # Quantile nodes of the narrow posterior; CDF parameters of the wide one
+    a_narrow, b_narrow = np.where(narrow_t, a_t, a_c), np.where(narrow_t, b_t, b_c)
+    a_wide, b_wide = np.where(narrow_t, a_c, a_t), np.where(narrow_t, b_c, b_t)
+    nodes = betaincinv(a_narrow[..., None], b_narrow[..., None], _GL_NODES)
+    a_wide, b_wide, narrow_t = a_wide[..., None], b_wide[..., None], narrow_t[..., None]
 
-def simulate_posterior_difference(a_c, b_c, a_t, b_t, n_draws=50000, random_state=42):
+    def integrate_wide_cdf(x):
+        # With a narrow treatment, P(p_c >= x); otherwise P(p_t <= x)
+        wide_cdf = betainc(a_wide, b_wide, np.clip(x, 0.0, 1.0))
+        return np.where(narrow_t, 1.0 - wide_cdf, wide_cdf) @ _GL_WEIGHTS
+
+    def difference_cdf(d):
+        d = np.asarray(d, dtype=float)[..., None]
+        return integrate_wide_cdf(np.where(narrow_t, nodes - d, nodes + d))
+
+    def ratio_cdf(r):
+        r = np.asarray(r, dtype=float)[..., None]
+        return integrate_wide_cdf(np.where(narrow_t, nodes / r, nodes * r))
+
+    return difference_cdf, ratio_cdf
+
+
+def _invert_cdf(cdf, low, high, probs):
     """
-    Draw samples from Beta(a_c, b_c) and Beta(a_t, b_t) and compute
-    the distribution of differences and relative lift.
+    Solve cdf(x) = p for each p in probs by bisection between the
+    per-cell brackets low and high.
 
-    Returns a dict of summary statistics.
+    Returns an array of shape (len(probs), *cells).
+    """
+    probs = np.asarray(probs, dtype=float).reshape((-1,) + (1,) * np.ndim(low))
+    low, high = low + 0 * probs, high + 0 * probs
+
+    for _ in range(48):
+        mid = (low + high) / 2
+        below = cdf(mid) < probs
+        low = np.where(below, mid, low)
+        high = np.where(below, high, mid)
+
+    return (low + high) / 2
+
+
+def prob_treatment_greater(a_c, b_c, a_t, b_t):
+    """
+    Exact P(treatment > control) for independent Beta posteriors.
+
+    When a_t is an integer of at most _MAX_SERIES_TERMS this uses the
+    closed-form identity
+
+        P = sum_{i=0}^{a_t-1} B(a_c+i, b_c+b_t)
+                              / ((b_t+i) B(1+i, b_t) B(a_c, b_c))
+
+    evaluated in log space; if that only holds for a_c, the complement
+    P(control > treatment) is used instead. Otherwise (non-integer
+    shapes, or large experiments where the series would need one term
+    per success) the probability is integrated numerically at a fixed
+    cost, see _posterior_pair_cdfs.
+    """
+    a_c, b_c, a_t, b_t = map(float, (a_c, b_c, a_t, b_t))
+
+    if a_t.is_integer() and a_t <= _MAX_SERIES_TERMS:
+        return _prob_treatment_greater_series(a_c, b_c, a_t, b_t)
+
+    if a_c.is_integer() and a_c <= _MAX_SERIES_TERMS:
+        return 1.0 - _prob_treatment_greater_series(a_t, b_t, a_c, b_c)
+
+    # Otherwise P(p_t > p_c) = 1 - P(p_t - p_c <= 0)
+    difference_cdf, _ = _posterior_pair_cdfs(a_c, b_c, a_t, b_t)
+    prob = 1.0 - float(difference_cdf(0.0))
+    return min(max(prob, 0.0), 1.0)
+
+
+def beta_marginal_summaries(a_c, b_c, a_t, b_t):
+    """
+    Exact posterior mean and 95% equal-tailed credible interval of each
+    marginal, Beta(a_c, b_c) and Beta(a_t, b_t).
+
+    The interval endpoints are Beta quantiles from the regularized
+    incomplete beta inverse (what scipy.stats.beta.ppf calls), so no
+    sampling is needed. Works elementwise on arrays.
+    """
+    a_c, b_c, a_t, b_t = (np.asarray(x, dtype=float) for x in (a_c, b_c, a_t, b_t))
+    return {
+        "posterior_mean_control": a_c / (a_c + b_c),
+        "control_ci_low": betaincinv(a_c, b_c, 0.025),
+        "control_ci_high": betaincinv(a_c, b_c, 0.975),
+        "posterior_mean_treatment": a_t / (a_t + b_t),
+        "treatment_ci_low": betaincinv(a_t, b_t, 0.025),
+        "treatment_ci_high": betaincinv(a_t, b_t, 0.975),
+    }
+
+
+def difference_quantiles(a_c, b_c, a_t, b_t, probs=(0.025, 0.975)):
+    """
+    Quantiles of the difference p_t - p_c for independent Beta
+    posteriors, elementwise over (broadcastable) arrays of parameters.
+
+    The CDF of the difference (see _posterior_pair_cdfs) is inverted by
+    bisection, for all cells at once, so the quantiles always lie in
+    [-1, 1] and follow the skew of small arms.
+
+    Returns an array of shape (len(probs), *cells).
+    """
+    a_c, b_c, a_t, b_t = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (a_c, b_c, a_t, b_t))
+    )
+    difference_cdf, _ = _posterior_pair_cdfs(a_c, b_c, a_t, b_t)
+
+    # p_t - p_c lies between these bounds with probability 1 - 4e-9
+    eps = 1e-9
+    low = betaincinv(a_t, b_t, eps) - betaincinv(a_c, b_c, 1 - eps)
+    high = betaincinv(a_t, b_t, 1 - eps) - betaincinv(a_c, b_c, eps)
+
+    return _invert_cdf(difference_cdf, low, high, probs)
+
+
+def relative_lift_quantiles(a_c, b_c, a_t, b_t, probs=(0.025, 0.975)):
+    """
+    Quantiles of the relative lift p_t / p_c - 1 for independent Beta
+    posteriors, elementwise over (broadcastable) arrays of parameters.
+
+    The CDF of the ratio (see _posterior_pair_cdfs) is inverted by
+    bisection on log r, for all cells at once.
+
+    Returns an array of shape (len(probs), *cells).
+    """
+    a_c, b_c, a_t, b_t = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (a_c, b_c, a_t, b_t))
+    )
+    _, ratio_cdf = _posterior_pair_cdfs(a_c, b_c, a_t, b_t)
+
+    # p_t / p_c lies between these bounds with probability 1 - 4e-9
+    eps = 1e-9
+    low = np.log(betaincinv(a_t, b_t, eps) / betaincinv(a_c, b_c, 1 - eps))
+    high = np.log(betaincinv(a_t, b_t, 1 - eps) / betaincinv(a_c, b_c, eps))
+
+    log_ratio = _invert_cdf(lambda log_r: ratio_cdf(np.exp(log_r)), low, high, probs)
+    return np.exp(log_ratio) - 1
+
+
+def posterior_differences_closed_form(a_c, b_c, a_t, b_t):
     """
-    rng = np.random.default_rng(random_state)
+    Closed-form summaries of Beta(a_t, b_t) - Beta(a_c, b_c), elementwise
+    over (broadcastable) arrays of posterior parameters.
 
-    control_samples = rng.beta(a_c, b_c, size=n_draws)
-    treatment_samples = rng.beta(a_t, b_t, size=n_draws)
+    Posterior means and marginal intervals are exact, and so are the 95%
+    intervals for the difference and the relative lift (see
+    difference_quantiles and relative_lift_quantiles). The relative-lift
+    mean mu_t * E[1 / p_c] - 1 is infinite when a_c <= 1.
+    P(treatment > control) is exact.
 
+    Returns a dict of summary statistics, each an array of the cell shape.
+    """
+    a_c, b_c, a_t, b_t = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (a_c, b_c, a_t, b_t))
+    )
+    marginals = beta_marginal_summaries(a_c, b_c, a_t, b_t)
+    mean_c = marginals["posterior_mean_control"]
+    mean_t = marginals["posterior_mean_treatment"]
+    diff_mean = mean_t - mean_c
+    diff_ci_low, diff_ci_high = difference_quantiles(a_c, b_c, a_t, b_t)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # E[p_t / p_c] = mu_t * E[1 / p_c], which is only finite for a_c > 1
+        rel_lift_mean = np.where(
+            a_c > 1, mean_t * (a_c + b_c - 1) / (a_c - 1) - 1, np.inf
+        )
+
+    rel_lift_ci_low, rel_lift_ci_high = relative_lift_quantiles(a_c, b_c, a_t, b_t)
+
+    prob_t_greater = np.array(
+        [
+            prob_treatment_greater(*params)
+            for params in zip(a_c.ravel(), b_c.ravel(), a_t.ravel(), b_t.ravel())
+        ]
+    ).reshape(a_c.shape)
+
+    return {
+        **marginals,
+        "posterior_mean_diff": diff_mean,
+        "diff_ci_low": diff_ci_low,
+        "diff_ci_high": diff_ci_high,
+        "posterior_mean_rel_lift": rel_lift_mean,
+        "rel_lift_ci_low": rel_lift_ci_low,
+        "rel_lift_ci_high": rel_lift_ci_high,
+        "prob_treatment_greater": prob_t_greater,
+    }
+
+
+def posterior_difference_closed_form(a_c, b_c, a_t, b_t):
+    """
+    Closed-form summaries for a single (control, treatment) pair.
+
+    Returns a dict with the same keys as simulate_posterior_difference.
+    """
+    summary = posterior_differences_closed_form(a_c, b_c, a_t, b_t)
+    return {key: float(value) for key, value in summary.items()}
+
+
+def _gamma_ratio_betas(rng, shapes, n_draws):
+    """
+    Draw (control, treatment) Beta samples for the stacked shape array
+    shapes[..., (a_c, b_c, a_t, b_t)], each of shape (n_draws, *cells).
+
+    Beta draws use the Gamma ratio X / (X + Y), X ~ Ga(a), Y ~ Ga(b),
+    whose cost does not depend on the shape parameters. All four shapes
+    come from a single standard_gamma call.
+    """
+    gammas = rng.standard_gamma(shapes, size=(n_draws,) + shapes.shape)
+    control_samples = gammas[..., 0] / (gammas[..., 0] + gammas[..., 1])
+    treatment_samples = gammas[..., 2] / (gammas[..., 2] + gammas[..., 3])
+    return control_samples, treatment_samples
+
+
+def _summarize_draws(control_samples, treatment_samples):
+    """
+    Reduce posterior draws along axis 0 into the difference and lift
+    statistics. The marginal summaries come from beta_marginal_summaries.
+    """
     diff = treatment_samples - control_samples
 
     # Relative lift; guard against division by zero
@@ -97,28 +329,97 @@ def simulate_posterior_difference(a_c, b_c, a_t, b_t, n_draws=50000, random_stat
             np.nan,
         )
 
-    prob_t_greater = float((treatment_samples > control_samples).mean())
-    diff_mean = float(diff.mean())
-    diff_ci_low, diff_ci_high = np.percentile(diff, [2.5, 97.5])
+    diff_ci_low, diff_ci_high = np.quantile(diff, [0.025, 0.975], axis=0)
+    # np.nanquantile mis-shapes its result when there are no cells
+    quantile = np.nanquantile if rel_lift.size else np.quantile
+    rel_lift_ci_low, rel_lift_ci_high = quantile(rel_lift, [0.025, 0.975], axis=0)
+
+    return {
+        "posterior_mean_diff": diff.mean(axis=0),
+        "diff_ci_low": diff_ci_low,
+        "diff_ci_high": diff_ci_high,
+        "posterior_mean_rel_lift": np.nanmean(rel_lift, axis=0),
+        "rel_lift_ci_low": rel_lift_ci_low,
+        "rel_lift_ci_high": rel_lift_ci_high,
+        "prob_treatment_greater": (treatment_samples > control_samples).mean(axis=0),
+    }
+
+
+def make_rng(random_state=42):
+    """
+    Generator on the PCG64DXSM bit generator, which is faster than the
+    default PCG64 for bulk draws. An existing Generator is returned as-is,
+    so one seeded generator can be threaded through repeated calls.
+    """
+    if isinstance(random_state, np.random.Generator):
+        return random_state
+    return np.random.Generator(np.random.PCG64DXSM(random_state))
+
+
+def simulate_posterior_differences(
+    a_c, b_c, a_t, b_t, n_draws=50000, random_state=42, n_jobs=1
+):
+    """
+    Batched Monte Carlo version of simulate_posterior_difference.
+
+    The posterior parameters may be arrays of any (broadcastable) shape,
+    e.g. (n_treatments, n_metrics).
+
+    random_state is a seed or a Generator (see make_rng). With n_jobs=1
+    all cells are drawn from that generator in one batch. Otherwise each
+    cell is simulated in its own thread (n_jobs=None uses every core) with
+    an independent child generator spawned from it; NumPy's samplers
+    release the GIL, so large n_draws scale with cores.
+
+    The marginal means and credible intervals are exact; only the
+    difference and lift statistics are estimated from the draws.
+
+    Returns a dict of summary statistics, each an array of the cell shape.
+    """
+    shapes = np.stack(
+        np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (a_c, b_c, a_t, b_t))),
+        axis=-1,
+    )
+    cell_shape = shapes.shape[:-1]
+    marginals = beta_marginal_summaries(*np.moveaxis(shapes, -1, 0))
+
+    rng = make_rng(random_state)
+
+    if n_jobs == 1 or cell_shape.count(0):
+        return {**marginals, **_summarize_draws(*_gamma_ratio_betas(rng, shapes, n_draws))}
+
+    cells = shapes.reshape(-1, 4)
 
-    rel_lift_mean = float(np.nanmean(rel_lift))
-    rel_lift_ci_low, rel_lift_ci_high = np.nanpercentile(rel_lift, [2.5, 97.5])
+    def simulate_cell(cell, cell_rng):
+        return _summarize_draws(*_gamma_ratio_betas(cell_rng, cell, n_draws))
+
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+        results = list(pool.map(simulate_cell, cells, rng.spawn(len(cells))))
 
     return {
-        "posterior_mean_control": float(control_samples.mean()),
-        "posterior_mean_treatment": float(treatment_samples.mean()),
-        "posterior_mean_diff": diff_mean,
-        "diff_ci_low": float(diff_ci_low),
-        "diff_ci_high": float(diff_ci_high),
-        "posterior_mean_rel_lift": rel_lift_mean,
-        "rel_lift_ci_low": float(rel_lift_ci_low),
-        "rel_lift_ci_high": float(rel_lift_ci_high),
-        "prob_treatment_greater": prob_t_greater,
+        **marginals,
+        **{
+            key: np.array([result[key] for result in results]).reshape(cell_shape)
+            for key in results[0]
+        },
     }
 
 
+def simulate_posterior_difference(a_c, b_c, a_t, b_t, n_draws=50000, random_state=42):
+    """
+    Draw samples from Beta(a_c, b_c) and Beta(a_t, b_t) and compute
+    the distribution of differences and relative lift.
+
+    Returns a dict of summary statistics.
+    """
+    summary = simulate_posterior_differences(
+        a_c, b_c, a_t, b_t, n_draws=n_draws, random_state=random_state
+    )
+    return {key: float(value) for key, value in summary.items()}
+
+
 # ------------------------------------------------------------
-# 3. Main Bayesian analysis
+# 2. Main Bayesian analysis
 # ------------------------------------------------------------
 
 def run_bayesian_experiment_analysis_from_user_level(
@@ -127,6 +428,10 @@ def run_bayesian_experiment_analysis_from_user_level(
     a_prior=1.0,
     b_prior=1.0,
     n_draws=50000,
+    method="closed_form",
+    n_jobs=1,
+    random_state=42,
+    agg=None,
 ):
     """
     Run Bayesian Beta-Binomial analysis comparing each treatment
@@ -135,50 +440,88 @@ def run_bayesian_experiment_analysis_from_user_level(
         - conversion_rate
         - new_booking_rate
 
-    Returns a DataFrame where each row is (variant, metric) with
-    posterior summaries and P(treatment > control).
-    """
-    agg = aggregate_for_experiment(df, experiment_name)
-
-    if "control" not in set(agg["variant"]):
-        raise ValueError("No 'control' variant found in the aggregated data.")
-
-    control = agg[agg["variant"] == "control"].iloc[0]
-    rows = []
+    method is "closed_form" (analytic summaries) or "simulation"
+    (Monte Carlo with n_draws samples per posterior). For simulation,
+    n_jobs > 1 (or None for all cores) simulates cells in parallel threads
+    and random_state seeds a single PCG64DXSM generator for all draws.
 
-    for _, tr in agg.iterrows():
-        if tr["variant"] == "control":
-            continue
+    agg, if given, is the output of aggregate_for_experiment(df,
+    experiment_name) and is used instead of aggregating df again.
 
-        n1, n2 = float(control["users"]), float(tr["users"])
+    Cells where either arm has no users (or the posterior is not a proper
+    Beta) are reported with NaN summaries.
 
-        for metric_name, count_col in [
-            ("activation_rate", "activations"),
-            ("conversion_rate", "conversions"),
-            ("new_booking_rate", "new_bookings"),
-        ]:
-            x1, x2 = float(control[count_col]), float(tr[count_col])
+    Returns a DataFrame where each row is (variant, metric) with
+    posterior summaries and P(treatment > control).
+    """
+    if method not in ("closed_form", "simulation"):
+        raise ValueError(f"Unknown method {method!r}; use 'closed_form' or 'simulation'.")
 
-            # Posterior parameters for control and treatment
-            a_c, b_c = beta_posterior_params(a_prior, b_prior, x1, n1)
-            a_t, b_t = beta_posterior_params(a_prior, b_prior, x2, n2)
+    if agg is None:
+        agg = aggregate_for_experiment(df, experiment_name)
 
-            summary = simulate_posterior_difference(
-                a_c, b_c, a_t, b_t, n_draws=n_draws
-            )
+    metrics = [
+        ("activation_rate", "activations"),
+        ("conversion_rate", "conversions"),
+        ("new_booking_rate", "new_bookings"),
+    ]
+    count_cols = [count_col for _, count_col in metrics]
 
-            rows.append(
-                {
-                    "experiment_name": experiment_name,
-                    "variant": tr["variant"],
-                    "metric": metric_name,
-                    "prior_a": a_prior,
-                    "prior_b": b_prior,
-                    **summary,
-                }
-            )
+    # Column-oriented access: one (n_variants, n_metrics) count array
+    variants = agg["variant"].to_numpy()
+    control_idx = np.flatnonzero(variants == "control")
+    if control_idx.size == 0:
+        raise ValueError("No 'control' variant found in the aggregated data.")
+    ctl = int(control_idx[0])
+    is_treatment = np.arange(len(variants)) != ctl
+
+    users = agg["users"].to_numpy(dtype=np.float64)
+    counts = agg[count_cols].to_numpy(dtype=np.float64)
+
+    # Conjugate update (see beta_posterior_params) for every
+    # (variant, metric) cell at once, then split into control and
+    # (n_treatments, n_metrics) treatment arrays
+    a_post = a_prior + counts
+    b_post = b_prior + users[:, None] - counts
+
+    a_t, b_t = a_post[is_treatment], b_post[is_treatment]
+    a_c = np.broadcast_to(a_post[ctl], a_t.shape)
+    b_c = np.broadcast_to(b_post[ctl], b_t.shape)
+
+    n_treatments, n_metrics = a_t.shape
+    if n_treatments == 0:
+        return pd.DataFrame()
+
+    # Degenerate cells (an arm with no users, or a non-positive posterior
+    # shape) get NaN summaries and are left out of the computation entirely
+    n_c, n_t = users[ctl], users[is_treatment][:, None]
+    valid = (a_c > 0) & (b_c > 0) & (a_t > 0) & (b_t > 0) & (n_c > 0) & (n_t > 0)
+    params = (a_c[valid], b_c[valid], a_t[valid], b_t[valid])
+
+    if method == "closed_form":
+        cell_summaries = posterior_differences_closed_form(*params)
+    else:
+        rng = make_rng(random_state)
+        cell_summaries = simulate_posterior_differences(
+            *params, n_draws=n_draws, random_state=rng, n_jobs=n_jobs
+        )
 
-    return pd.DataFrame(rows)
+    summaries = {}
+    for key, value in cell_summaries.items():
+        summaries[key] = np.full(a_t.shape, np.nan)
+        summaries[key][valid] = value
+
+    # Assemble the (variant, metric) rows column by column, variant-major
+    return pd.DataFrame(
+        {
+            "experiment_name": experiment_name,
+            "variant": np.repeat(variants[is_treatment], n_metrics),
+            "metric": np.tile([metric_name for metric_name, _ in metrics], n_treatments),
+            "prior_a": a_prior,
+            "prior_b": b_prior,
+            **{key: value.ravel() for key, value in summaries.items()},
+        }
+    )
 
 
 def run_bayesian_experiment_analysis(
@@ -187,22 +530,30 @@ def run_bayesian_experiment_analysis(
     a_prior=1.0,
     b_prior=1.0,
     n_draws=50000,
+    method="closed_form",
+    n_jobs=1,
+    random_state=42,
 ):
     """
     Convenience wrapper: load the CSV from disk and run the Bayesian analysis.
     """
-    df = pd.read_csv(csv_path)
+    df = load_experiment_outcomes(csv_path, experiment_name)
+    agg = aggregate_for_experiment(df, experiment_name, prefiltered=True)
     return run_bayesian_experiment_analysis_from_user_level(
         df,
         experiment_name=experiment_name,
         a_prior=a_prior,
         b_prior=b_prior,
         n_draws=n_draws,
+        method=method,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        agg=agg,
     )
 
 
 # ------------------------------------------------------------
-# 4. Script entry point
+# 3. Script entry point
 # ------------------------------------------------------------
 
 if __name__ == "__main__":
@@ -12,185 +12,258 @@ data/synthetic_experiment_outcomes.csv.
 """
 
 import math
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-from scipy.stats import norm, t
+from scipy.special import ndtr, stdtr
+
+from _cohort import aggregate_for_experiment, load_experiment_outcomes
 
 
 # ------------------------------------------------------------
 # 1. Statistical test helpers
 # ------------------------------------------------------------
 
-def two_proportion_ztest(n1, x1, n2, x2):
+@lru_cache(maxsize=None)
+def _compiled(func):
     """
-    Two-proportion z-test on aggregated counts.
+    func compiled with numba, or None if numba is not installed.
 
-    n1, x1: sample size and successes for control
-    n2, x2: sample size and successes for treatment
-    Returns (z_stat, p_value) or (None, None) if invalid.
+    numba is imported on the first call rather than with this module, so
+    code paths that never use a compiled helper do not pay for it.
+    """
+    try:
+        from numba import njit
+    except ImportError:  # numba is optional
+        return None
+    return njit(cache=True)(func)
+
+
+def _ztest(n1, x1, n2, x2):
+    """
+    z statistic and two-sided p-value for the two-proportion test, or
+    (NaN, NaN) if undefined.
     """
-    n1, x1, n2, x2 = map(float, (n1, x1, n2, x2))
     if n1 == 0 or n2 == 0:
-        return None, None
+        return np.nan, np.nan
 
     p1, p2 = x1 / n1, x2 / n2
     pooled = (x1 + x2) / (n1 + n2)
-    if pooled in (0, 1):
-        return None, None
+    if pooled == 0 or pooled == 1:
+        return np.nan, np.nan
 
     se = math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
     if se == 0:
-        return None, None
+        return np.nan, np.nan
 
     z = (p2 - p1) / se
-    p = 2 * (1 - norm.cdf(abs(z)))
-    return z, p
+    # 2 * (1 - Phi(|z|)) == erfc(|z| / sqrt(2))
+    return z, math.erfc(abs(z) / math.sqrt(2))
 
 
-def two_sample_ttest(m1, s1, n1, m2, s2, n2):
+def _welch_stat(m1, s1, n1, m2, s2, n2):
     """
-    Welch’s two-sample t-test from summary stats.
-
-    m*: means, s*: standard deviations, n*: sample sizes
-    Returns (t_stat, p_value) or (None, None) if invalid.
+    Welch t statistic and degrees of freedom, or (NaN, NaN) if undefined.
     """
-    m1, s1, n1 = float(m1), float(s1), float(n1)
-    m2, s2, n2 = float(m2), float(s2), float(n2)
-
     if n1 <= 1 or n2 <= 1:
-        return None, None
+        return np.nan, np.nan
 
     se = math.sqrt(s1**2 / n1 + s2**2 / n2)
     if se == 0:
-        return None, None
+        return np.nan, np.nan
 
     tstat = (m2 - m1) / se
     df_num = (s1**2 / n1 + s2**2 / n2) ** 2
     df_den = (s1**4 / (n1**2 * (n1 - 1))) + (s2**4 / (n2**2 * (n2 - 1)))
     if df_den == 0:
+        return np.nan, np.nan
+
+    return tstat, df_num / df_den
+
+
+def two_proportion_ztest(n1, x1, n2, x2):
+    """
+    Two-proportion z-test on aggregated counts.
+
+    n1, x1: sample size and successes for control
+    n2, x2: sample size and successes for treatment
+    Returns (z_stat, p_value) or (None, None) if invalid.
+
+    With numba installed, the first call in a process imports numba and
+    compiles the test (or loads it from numba's on-disk cache). For a
+    one-off test, or many at once, two_proportion_ztests avoids that cost.
+    """
+    ztest = _compiled(_ztest) or _ztest  # plain Python without numba
+    z, p = ztest(*map(float, (n1, x1, n2, x2)))
+    if math.isnan(z):
         return None, None
 
-    dfree = df_num / df_den
-    pval = 2 * (1 - t.cdf(abs(tstat), dfree))
-    return tstat, pval
+    return z, p
 
 
-# ------------------------------------------------------------
-# 2. Aggregation helpers
-# ------------------------------------------------------------
+def two_proportion_ztests(n1, x1, n2, x2):
+    """
+    Vectorized two-proportion z-tests on arrays of aggregated counts.
 
-def aggregate_for_experiment(df, experiment_name="homepage_cta_test"):
+    n1, x1: sample sizes and successes for control
+    n2, x2: sample sizes and successes for treatment
+    All four broadcast together, e.g. one row per treatment arm and one
+    column per metric.
+    Returns (z_stats, p_values) arrays, NaN where a test is invalid.
     """
-    Filter to a clean cohort and aggregate metrics by variant.
+    n1, x1, n2, x2 = (np.asarray(v, dtype=float) for v in (n1, x1, n2, x2))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled = (x1 + x2) / (n1 + n2)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        z = (x2 / n2 - x1 / n1) / se
+
+    valid = (n1 > 0) & (n2 > 0) & (pooled > 0) & (pooled < 1) & (se > 0)
+    z = np.where(valid, z, np.nan)
+
+    # Only evaluate the normal tail for tests that are actually defined
+    p = np.full(z.shape, np.nan)
+    if valid.any():
+        p[valid] = 2 * ndtr(-np.abs(z[valid]))
+    return z, p
 
-    Returns a DataFrame with:
-    - users, activations, conversions, new_bookings
-    - total_new_mrr, total_revenue
-    - avg_nb_mrr, sd_nb_mrr, n_nb_mrr (for t-test)
+
+def two_sample_ttest(m1, s1, n1, m2, s2, n2):
     """
-    clean = df[
-        (df["experiment_name"] == experiment_name)
-        & (df["is_eligible_visitor"] == 1)
-        & (df["contamination_flag"] == "Not Contaminated")
-        & (df["duplication_rank"] == 1)
-    ]
+    Welch’s two-sample t-test from summary stats.
 
-    agg = (
-        clean.groupby("variant")
-        .agg(
-            users=("user_id", "nunique"),
-            activations=("is_activated", "sum"),
-            conversions=("is_converted", "sum"),
-            new_bookings=("new_booking_flag", "sum"),
-            total_new_mrr=("nb_mrr", "sum"),
-            total_revenue=("total_revenue", "sum"),
-            avg_nb_mrr=("nb_mrr", "mean"),
-            sd_nb_mrr=("nb_mrr", "std"),
-            n_nb_mrr=("nb_mrr", "size"),
-        )
-        .reset_index()
-    )
+    m*: means, s*: standard deviations, n*: sample sizes
+    Returns (t_stat, p_value) or (None, None) if invalid.
 
-    return agg
+    With numba installed, the first call in a process imports numba and
+    compiles the test (or loads it from numba's on-disk cache). For a
+    one-off test, or many at once, two_sample_ttests avoids that cost.
+    """
+    welch_stat = _compiled(_welch_stat) or _welch_stat  # plain Python without numba
+    tstat, dfree = welch_stat(*map(float, (m1, s1, n1, m2, s2, n2)))
+    if math.isnan(tstat):
+        return None, None
+
+    pval = 2 * stdtr(dfree, -abs(tstat))
+    return tstat, float(pval)
+
+
+def two_sample_ttests(m1, s1, n1, m2, s2, n2):
+    """
+    Vectorized Welch's t-tests on arrays of summary stats.
+
+    m*: means, s*: standard deviations, n*: sample sizes, broadcast
+    together (e.g. one control against every treatment arm).
+    Returns (t_stats, p_values) arrays, NaN where a test is invalid.
+    """
+    m1, s1, n1, m2, s2, n2 = (np.asarray(v, dtype=float) for v in (m1, s1, n1, m2, s2, n2))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se = np.sqrt(s1**2 / n1 + s2**2 / n2)
+        t = (m2 - m1) / se
+        df_num = (s1**2 / n1 + s2**2 / n2) ** 2
+        df_den = (s1**4 / (n1**2 * (n1 - 1))) + (s2**4 / (n2**2 * (n2 - 1)))
+
+    valid = (n1 > 1) & (n2 > 1) & (se > 0) & (df_den != 0) & ~np.isnan(t)
+    t = np.where(valid, t, np.nan)
+
+    p = np.full(t.shape, np.nan)
+    if valid.any():
+        p[valid] = 2 * stdtr((df_num / df_den)[valid], -np.abs(t[valid]))
+    return t, p
 
 
 # ------------------------------------------------------------
-# 3. Main analysis function
+# 2. Main analysis function
 # ------------------------------------------------------------
 
-def run_experiment_analysis_from_user_level(df, experiment_name="homepage_cta_test"):
+def run_experiment_analysis_from_user_level(df, experiment_name="homepage_cta_test", agg=None):
     """
     Run a small suite of tests comparing each treatment variant to control.
     Returns a DataFrame where each row is a (variant, metric) pair.
+
+    agg, if given, is the output of aggregate_for_experiment(df,
+    experiment_name) and is used instead of aggregating df again.
     """
-    agg = aggregate_for_experiment(df, experiment_name)
+    if agg is None:
+        agg = aggregate_for_experiment(df, experiment_name)
 
-    if "control" not in set(agg["variant"]):
+    # Column-oriented access: pull each metric out once as a float array
+    variants = agg["variant"].to_numpy()
+    control_idx = np.flatnonzero(variants == "control")
+    if control_idx.size == 0:
         raise ValueError("No 'control' variant found in the aggregated data.")
+    ctl = int(control_idx[0])
+
+    metrics = [
+        ("activation_rate", "activations"),
+        ("conversion_rate", "conversions"),
+        ("new_booking_rate", "new_bookings"),
+    ]
+
+    users = agg["users"].to_numpy(dtype=np.float64)
+    counts = agg[[count_col for _, count_col in metrics]].to_numpy(dtype=np.float64)
+    avg_mrr = agg["avg_nb_mrr"].to_numpy(dtype=np.float64)
+    sd_mrr = agg["sd_nb_mrr"].to_numpy(dtype=np.float64)
+    n_mrr = agg["n_nb_mrr"].to_numpy(dtype=np.float64)
+
+    treatments = np.flatnonzero(np.arange(len(variants)) != ctl)
+    n_treatments, n_metrics = len(treatments), len(metrics)
+
+    # Proportion metrics: every (treatment, metric) z-test in one call
+    n1, n2 = users[ctl], users[treatments][:, None]
+    x1, x2 = counts[ctl], counts[treatments]
+    zs, ps = two_proportion_ztests(n1, x1, n2, x2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        control_rate = np.broadcast_to(x1 / n1, zs.shape)
+        treatment_rate = x2 / n2
+        lift = np.where(x1 > 0, (treatment_rate - control_rate) / control_rate, np.nan)
+
+    z_valid = ~np.isnan(zs.ravel())
+    proportion_results = pd.DataFrame(
+        {
+            "experiment_name": experiment_name,
+            "variant": np.repeat(variants[treatments], n_metrics),
+            "metric": np.tile([metric_name for metric_name, _ in metrics], n_treatments),
+            "test": "two-proportion z-test",
+            "control_rate": control_rate.ravel(),
+            "treatment_rate": treatment_rate.ravel(),
+            "lift": lift.ravel(),
+            "statistic": zs.ravel(),
+            "p_value": ps.ravel(),
+        }
+    )[z_valid]
+
+    # Continuous metric: average new-booking MRR per user
+    tstats, pvals = two_sample_ttests(
+        avg_mrr[ctl], sd_mrr[ctl], n_mrr[ctl],
+        avg_mrr[treatments], sd_mrr[treatments], n_mrr[treatments],
+    )
 
-    control = agg[agg["variant"] == "control"].iloc[0]
-    rows = []
-
-    for _, tr in agg.iterrows():
-        if tr["variant"] == "control":
-            continue
-
-        n1, n2 = control["users"], tr["users"]
-
-        # Proportion metrics: activation, conversion, new booking
-        for metric_name, count_col in [
-            ("activation_rate", "activations"),
-            ("conversion_rate", "conversions"),
-            ("new_booking_rate", "new_bookings"),
-        ]:
-            x1, x2 = control[count_col], tr[count_col]
-            z, p = two_proportion_ztest(n1, x1, n2, x2)
-            if z is None:
-                continue
-
-            rows.append(
-                {
-                    "experiment_name": experiment_name,
-                    "variant": tr["variant"],
-                    "metric": metric_name,
-                    "test": "two-proportion z-test",
-                    "control_rate": (x1 / n1) if n1 else None,
-                    "treatment_rate": (x2 / n2) if n2 else None,
-                    "lift": (
-                        ((x2 / n2) - (x1 / n1)) / (x1 / n1)
-                        if (x1 and n1 and n2)
-                        else None
-                    ),
-                    "statistic": z,
-                    "p_value": p,
-                }
-            )
-
-        # Continuous metric: average new-booking MRR per user
-        tstat, pval = two_sample_ttest(
-            control["avg_nb_mrr"],
-            control["sd_nb_mrr"],
-            control["n_nb_mrr"],
-            tr["avg_nb_mrr"],
-            tr["sd_nb_mrr"],
-            tr["n_nb_mrr"],
-        )
-
-        if tstat is not None:
-            rows.append(
-                {
-                    "experiment_name": experiment_name,
-                    "variant": tr["variant"],
-                    "metric": "average_nb_mrr_per_user",
-                    "test": "Welch two-sample t-test",
-                    "control_mean": control["avg_nb_mrr"],
-                    "treatment_mean": tr["avg_nb_mrr"],
-                    "diff": tr["avg_nb_mrr"] - control["avg_nb_mrr"],
-                    "statistic": tstat,
-                    "p_value": pval,
-                }
-            )
-
-    return pd.DataFrame(rows)
+    t_valid = ~np.isnan(tstats)
+    ttest_results = pd.DataFrame(
+        {
+            "experiment_name": experiment_name,
+            "variant": variants[treatments],
+            "metric": "average_nb_mrr_per_user",
+            "test": "Welch two-sample t-test",
+            "control_mean": avg_mrr[ctl],
+            "treatment_mean": avg_mrr[treatments],
+            "diff": avg_mrr[treatments] - avg_mrr[ctl],
+            "statistic": tstats,
+            "p_value": pvals,
+        }
+    )[t_valid]
+
+    # Interleave so each variant's proportion rows are followed by its t-test
+    slot = np.arange(n_treatments)[:, None] * (n_metrics + 1)
+    order = np.concatenate(
+        [(slot + np.arange(n_metrics)).ravel()[z_valid], (slot[:, 0] + n_metrics)[t_valid]]
+    )
+    results = pd.concat([proportion_results, ttest_results], ignore_index=True)
+    return results.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
 
 
 def run_experiment_analysis(
@@ -200,12 +273,13 @@ def run_experiment_analysis(
     """
     Convenience wrapper: load the CSV from disk and run the analysis.
     """
-    df = pd.read_csv(csv_path)
-    return run_experiment_analysis_from_user_level(df, experiment_name)
+    df = load_experiment_outcomes(csv_path, experiment_name)
+    agg = aggregate_for_experiment(df, experiment_name, prefiltered=True)
+    return run_experiment_analysis_from_user_level(df, experiment_name, agg=agg)
 
 
 # ------------------------------------------------------------
-# 4. Script entry point
+# 3. Script entry point
 # ------------------------------------------------------------
 
 if __name__ == "__main__":